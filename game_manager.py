@@ -1,29 +1,63 @@
+import random
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
 from board import Board
-from player import Player, HumanPlayer, RandomPlayer, HeuristicPlayer
+from player import ERAS, Player, HumanPlayer, RandomPlayer, HeuristicPlayer
 from move import Move
+from piece import Piece
 from move_history import MoveHistory
-from game_state import GameState
+from move_inverse import MoveInverse
+
+BOARD_SIZE = 4
+MAX_SUPPLY = 8
+
+PLAYER_TYPES = {
+    'human': HumanPlayer,
+    'random': RandomPlayer,
+    'heuristic': HeuristicPlayer,
+}
+
+
+def _build_zobrist_keys() -> Dict[tuple, int]:
+    """
+    Generates a random 64-bit key for every piece placement, focus token and
+    supply count that can appear in a position, plus one per player to tell
+    apart the same position seen from either side.
+    """
+    rng = random.Random(327)
+    keys = {}
+    for owner in ['white', 'black']:
+        keys[('player', owner)] = rng.getrandbits(64)
+        for board_name in ERAS:
+            keys[('focus', owner, board_name)] = rng.getrandbits(64)
+            for x in range(BOARD_SIZE):
+                for y in range(BOARD_SIZE):
+                    keys[(board_name, x, y, owner)] = rng.getrandbits(64)
+        for count in range(MAX_SUPPLY):
+            keys[('supply', owner, count)] = rng.getrandbits(64)
+    return keys
 
-import copy
 
 class GameManager:
+    ZOBRIST_KEYS: Dict[tuple, int] = _build_zobrist_keys()
+
     def __init__(self, white_player_type: str, black_player_type: str,
                  history_enabled: bool = False, score_display_enabled: bool = False):
         # Initialize boards
-        self.boards: Dict[str, Board] = {
-            'past': Board('past'),
-            'present': Board('present'),
-            'future': Board('future')
-        }
+        self.boards: Dict[str, Board] = {board_name: Board(board_name) for board_name in ERAS}
         # Initialize players
         self.players: List[Player] = [
             self.create_player('white', white_player_type),
             self.create_player('black', black_player_type)
         ]
+        self.players_by_name: Dict[str, Player] = {player.name: player for player in self.players}
         self.current_player_index: int = 0  # 0 for white, 1 for black
         self.turn_number: int = 1
         self.history_enabled: bool = history_enabled
         self.score_display_enabled: bool = score_display_enabled
+        # Board displays and move announcements are only printed when a human is playing
+        self.verbose: bool = any(isinstance(player, HumanPlayer) for player in self.players)
         self.move_history: Optional[MoveHistory] = MoveHistory() if history_enabled else None
 
         # Place initial pieces on the boards
@@ -31,45 +65,50 @@ class GameManager:
         # Set initial focus tokens
         self.players[0].focus_board = 'past'    # White focuses on 'past'
         self.players[1].focus_board = 'future'  # Black focuses on 'future'
+        self.zobrist_hash: int = self.compute_zobrist_hash()
+
+    def get_owner(self, piece: Piece) -> Player:
+        # The player the piece belongs to
+        return self.players_by_name[piece.owner]
 
     def create_player(self, name: str, player_type: str) -> Player:
-        if player_type == 'human':
-            return HumanPlayer(name)
-        elif player_type == 'random':
-            return RandomPlayer(name)
-        elif player_type == 'heuristic':
-            return HeuristicPlayer(name)
-        else:
+        player_class = PLAYER_TYPES.get(player_type)
+        if player_class is None:
             raise ValueError(f"Unknown player type: {player_type}")
+        return player_class(name)
 
     def setup_initial_pieces(self):
         # Assuming identifiers 'A', 'B', 'C' for white, '1', '2', '3' for black
         # Place white pieces on bottom-right corner of each board
         white_identifiers = ['A', 'B', 'C']
-        for idx, board_name in enumerate(['past', 'present', 'future']):
+        for idx, board_name in enumerate(ERAS):
             piece = self.players[0].supply.pop(0)  # Remove from supply
             piece.identifier = white_identifiers[idx]
             piece.board = self.boards[board_name]
+            piece.era = board_name
+            piece.position = (3, 3)
             piece.x = 3  # Bottom-right corner (x-coordinate)
             piece.y = 3  # Bottom-right corner (y-coordinate)
             self.boards[board_name].place_piece(piece, 3, 3)
-            self.players[0].pieces.append(piece)
+            self.players[0].add_piece(piece)
 
         # Place black pieces on top-left corner of each board
         black_identifiers = ['1', '2', '3']
-        for idx, board_name in enumerate(['past', 'present', 'future']):
+        for idx, board_name in enumerate(ERAS):
             piece = self.players[1].supply.pop(0)
             piece.identifier = black_identifiers[idx]
             piece.board = self.boards[board_name]
+            piece.era = board_name
+            piece.position = (0, 0)
             piece.x = 0  # Top-left corner
             piece.y = 0  # Top-left corner
             self.boards[board_name].place_piece(piece, 0, 0)
-            self.players[1].pieces.append(piece)
+            self.players[1].add_piece(piece)
 
     def run_game(self):
         while True:
             current_player = self.players[self.current_player_index]
-            opponent = self.players[1 - self.current_player_index]
+            opponent = self.players[self.current_player_index ^ 1]
 
             # Check for game end condition
             if self.check_game_end(opponent):
@@ -82,7 +121,8 @@ class GameManager:
                     break
 
             # Display the boards
-            self.display_boards()
+            if self.verbose:
+                self.display_boards()
 
             # History management (undo/redo/next)
             if self.history_enabled and isinstance(current_player, HumanPlayer):
@@ -108,17 +148,12 @@ class GameManager:
                 # For AI players or if history is disabled
                 pass
 
-            # Save the current state for undo functionality
-            if self.history_enabled:
-                game_state = self.create_game_state()
-                self.move_history.save_state(game_state)
-
             # Get the current player's move
             current_player.make_move(self)
 
             # Increment turn and switch player
             self.turn_number += 1
-            self.current_player_index = 1 - self.current_player_index
+            self.current_player_index ^= 1
 
     def reset_game(self):
         # Reinitialize the game manager
@@ -131,15 +166,12 @@ class GameManager:
 
     def check_game_end(self, opponent: Player) -> bool:
         # If opponent has pieces in only one era board, current player wins
-        eras_with_pieces = set()
-        for piece in opponent.pieces:
-            eras_with_pieces.add(piece.board.name)
-        return len(eras_with_pieces) <= 1
+        return opponent.eras_occupied <= 1
 
     def display_boards(self):
         print("---------------------------------")
         # Display focus tokens and board state
-        for board_name in ['past', 'present', 'future']:
+        for board_name in ERAS:
             board = self.boards[board_name]
             focus = ''
             if self.players[0].focus_board == board_name:
@@ -150,56 +182,121 @@ class GameManager:
             board.display()
         print(f"Turn: {self.turn_number}, Current player: {self.players[self.current_player_index].name}")
 
-    def create_game_state(self) -> GameState:
-        # Deep copy of the game state
-        state = GameState(
-            boards=copy.deepcopy(self.boards),
-            players=copy.deepcopy(self.players),
-            current_player_index=self.current_player_index,
-            turn_number=self.turn_number
-        )
-        return state
+    def compute_zobrist_hash(self) -> int:
+        # XOR together the keys of every piece placement, focus token and supply count
+        keys = self.ZOBRIST_KEYS
+        zobrist_hash = 0
+        for player in self.players:
+            zobrist_hash ^= keys[('focus', player.name, player.focus_board)]
+            zobrist_hash ^= keys[('supply', player.name, len(player.supply))]
+            for piece in player.pieces:
+                if piece.board is not None:
+                    zobrist_hash ^= keys[(piece.board.name, piece.x, piece.y, player.name)]
+        return zobrist_hash
+
+    def position_changed(self, before: Optional[MoveInverse] = None):
+        # Update derived state after the position changed from the scoped record `before`;
+        # without one, or for a full image, rebuild it from scratch
+        if before is None or before.is_full_image:
+            for player in self.players:
+                player.index_pieces()
+            self.zobrist_hash = self.compute_zobrist_hash()
+            return
+        # XOR out the recorded focus tokens and squares, XOR in the current ones
+        keys = self.ZOBRIST_KEYS
+        zobrist_hash = self.zobrist_hash
+        for player, focus_board in before.focus_boards:
+            zobrist_hash ^= keys[('focus', player.name, focus_board)]
+            zobrist_hash ^= keys[('focus', player.name, player.focus_board)]
+        for piece, x, y, _, _, _, board_name in before.placements:
+            if board_name is not None:
+                zobrist_hash ^= keys[(board_name, x, y, piece.owner)]
+            if piece.board is not None:
+                zobrist_hash ^= keys[(piece.board.name, piece.x, piece.y, piece.owner)]
+            self.get_owner(piece).piece_moved(piece, board_name, x, y)
+        self.zobrist_hash = zobrist_hash
 
-    def restore_game_state(self, state: GameState):
-        self.boards = state.boards
-        self.players = state.players
-        self.current_player_index = state.current_player_index
-        self.turn_number = state.turn_number
+    def position_key(self, player: Player) -> int:
+        # Hash of the current position as seen by the given player
+        return self.zobrist_hash ^ self.ZOBRIST_KEYS[('player', player.name)]
 
     def apply_move(self, move: Move):
+        # Record the full position right before the move, then keep only what it changed
+        inverse = MoveInverse.for_position(self)
         # Execute the move
         move.execute(self)
-        # If history is enabled, save the move
+        inverse = inverse.narrowed()
+        self.position_changed(inverse)
+        # If history is enabled, save the move with its inverse
         if self.history_enabled:
-            self.move_history.add_move(move)
+            self.move_history.record(move, inverse)
+
+    @contextmanager
+    def simulate_move(self, move: Move) -> Iterator[None]:
+        # Apply the move for evaluation only: nothing is written to the move history.
+        # Only what the move changed is restored, in place, on exit
+        inverse = MoveInverse.for_position(self)
+        changes = None
+        try:
+            move.execute(self)
+            changes = inverse.narrowed()
+            self.position_changed(changes)
+            yield
+        finally:
+            if changes is not None:
+                self.revert(changes)
+            else:
+                # The move failed part-way, so restore the full image and rebuild derived state
+                inverse.apply(self)
+                self.position_changed()
+
+    def change_focus(self, player: Player, new_focus: str):
+        # Move only the player's focus token, for turns with no copies to move
+        inverse = MoveInverse.for_focus(player)
+        player.update_focus(new_focus)
+        self.position_changed(inverse)
+        if self.history_enabled:
+            self.move_history.record(None, inverse)
+
+    def revert(self, inverse: MoveInverse) -> MoveInverse:
+        # Play an inverse back in place; returns the inverse that replays what it undid
+        replay = inverse.reverse()
+        inverse.apply(self)
+        self.position_changed(replay)
+        return replay
 
     def undo_move(self):
         if self.history_enabled and self.move_history.can_undo():
-            state = self.move_history.undo(self)
-            self.restore_game_state(state)
+            self.move_history.undo(self)
             # Adjust turn and player index
             self.turn_number -= 1
-            self.current_player_index = 1 - self.current_player_index
+            self.current_player_index ^= 1
         else:
             print("Cannot undo")
 
     def redo_move(self):
         if self.history_enabled and self.move_history.can_redo():
-            state = self.move_history.redo(self)
-            self.restore_game_state(state)
+            self.move_history.redo(self)
             # Adjust turn and player index
             self.turn_number += 1
-            self.current_player_index = 1 - self.current_player_index
+            self.current_player_index ^= 1
         else:
             print("Cannot redo")
 
     def get_valid_moves(self, player: Player) -> List[Move]:
         # Generate all valid moves for the player
-        valid_moves = []
-        focus_board = self.boards[player.focus_board]
-        active_pieces = [piece for piece in player.pieces if piece.board == focus_board]
-        for piece in active_pieces:
-            possible_moves = piece.get_possible_moves(self)
-            valid_moves.extend(possible_moves)
-        return valid_moves
+        return list(self.iter_valid_moves(player))
+
+    def iter_valid_moves(self, player: Player) -> Iterator[Move]:
+        # Yield the valid moves of each of the player's pieces on its focus board
+        for piece in player.pieces_by_era[player.focus_board]:
+            yield from piece.get_possible_moves(self)
+
+    def sample_valid_move(self, player: Player, rng=random) -> Optional[Move]:
+        # Pick a uniformly random valid move by reservoir sampling, without building the move list
+        chosen = None
+        for count, move in enumerate(self.iter_valid_moves(player), start=1):
+            if rng.randrange(count) == 0:
+                chosen = move
+        return chosen
 
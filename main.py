@@ -6,6 +6,9 @@ DEFAULT_BLACK_PLAYER = 'human'
 DEFAULT_HISTORY = 'off'
 DEFAULT_SCORE_DISPLAY = 'off'
 
+_PLAYERS = frozenset({'human', 'heuristic', 'random'})
+_ONOFF = frozenset({'on', 'off'})
+
 def parse_arguments():
     """
     Parse the given arguments in command line
@@ -22,17 +25,16 @@ def validate_arguments(white_player, black_player, history, score_display):
     """
     Validates that provided arguments correspond to player classes
     """
-    player_types = ['human', 'heuristic', 'random']
-    if white_player not in player_types:
+    if white_player not in _PLAYERS:
         print(f"Invalid white player type: {white_player}")
         sys.exit(1)
-    if black_player not in player_types:
+    if black_player not in _PLAYERS:
         print(f"Invalid black player type: {black_player}")
         sys.exit(1)
-    if history not in ['on', 'off']:
+    if history not in _ONOFF:
         print(f"Invalid history option: {history}")
         sys.exit(1)
-    if score_display not in ['on', 'off']:
+    if score_display not in _ONOFF:
         print(f"Invalid score display option: {score_display}")
         sys.exit(1)
 
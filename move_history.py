@@ -0,0 +1,48 @@
+from typing import List, Optional, Tuple
+
+from move import Move
+from move_inverse import MoveInverse
+
+
+class MoveHistory:
+    __slots__ = ('_undo_stack', '_redo_stack')
+
+    def __init__(self):
+        """
+        Initialize empty undo and redo stacks of (move, inverse) pairs.
+        """
+        self._undo_stack: List[Tuple[Optional[Move], MoveInverse]] = []
+        self._redo_stack: List[Tuple[Optional[Move], MoveInverse]] = []
+
+    def record(self, move: Optional[Move], inverse: MoveInverse):
+        """
+        Records a turn just played, with the inverse built before it was applied.
+        Any redoable turns are discarded.
+        :param move: The move played, or None for a focus-only turn.
+        """
+        self._undo_stack.append((move, inverse))
+        self._redo_stack.clear()
+
+    def can_undo(self) -> bool:
+        return bool(self._undo_stack)
+
+    def can_redo(self) -> bool:
+        return bool(self._redo_stack)
+
+    def undo(self, game_manager) -> Optional[Move]:
+        """
+        Reverts the most recent turn and makes it available for redo.
+        :return: The move that was undone, or None for a focus-only turn.
+        """
+        move, inverse = self._undo_stack.pop()
+        self._redo_stack.append((move, game_manager.revert(inverse)))
+        return move
+
+    def redo(self, game_manager) -> Optional[Move]:
+        """
+        Replays the most recently undone turn.
+        :return: The move that was redone, or None for a focus-only turn.
+        """
+        move, inverse = self._redo_stack.pop()
+        self._undo_stack.append((move, game_manager.revert(inverse)))
+        return move
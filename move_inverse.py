@@ -0,0 +1,115 @@
+from typing import List, Optional, Tuple
+
+from piece import Piece
+from player import Player
+
+
+class MoveInverse:
+    __slots__ = ('focus_boards', 'placements', 'members')
+
+    def __init__(self, players: List[Player], pieces: List[Piece], include_members: bool = False):
+        """
+        Records the before-image of the given players' focus tokens and the given
+        pieces' placements. Boards are stored by name. With include_members, each
+        player's piece and supply lists are recorded as well, for turns that
+        capture or deploy pieces.
+        """
+        self.focus_boards: List[Tuple[Player, str]] = [(player, player.focus_board) for player in players]
+        self.placements = [(piece,) + self._placement(piece) for piece in pieces]
+        self.members: Optional[List[Tuple[Player, List[Piece], List[Piece]]]] = (
+            [(player, list(player.pieces), list(player.supply)) for player in players]
+            if include_members else None
+        )
+
+    @classmethod
+    def for_focus(cls, player: Player) -> 'MoveInverse':
+        """
+        Records a player's focus token, for turns that only change focus.
+        """
+        return cls([player], [])
+
+    @classmethod
+    def for_position(cls, game_manager) -> 'MoveInverse':
+        """
+        Records the full position: every focus token, piece list and piece placement.
+        """
+        players = game_manager.players
+        pieces = [piece for player in players for piece in player.pieces + player.supply]
+        return cls(players, pieces, include_members=True)
+
+    @staticmethod
+    def _placement(piece: Piece) -> tuple:
+        return (piece.x, piece.y, piece.era, piece.position, piece.identifier,
+                piece.board.name if piece.board is not None else None)
+
+    def narrowed(self) -> 'MoveInverse':
+        """
+        Returns the part of this full image that the position has changed since:
+        the focus tokens and the pieces whose placement differs. If any piece list
+        changed (a capture or a deployment), the full image is returned as is.
+        Called right after a move executes, so the record is scoped by what the
+        move did rather than by a copy of the movement rules.
+        """
+        if self.members is None:
+            return self
+        for player, pieces, supply in self.members:
+            if not (_same_pieces(player.pieces, pieces) and _same_pieces(player.supply, supply)):
+                return self
+        narrowed = MoveInverse([], [])
+        narrowed.focus_boards = self.focus_boards
+        narrowed.placements = [placement for placement in self.placements
+                               if self._placement(placement[0]) != placement[1:]]
+        return narrowed
+
+    @property
+    def is_full_image(self) -> bool:
+        return self.members is not None
+
+    def reverse(self) -> 'MoveInverse':
+        """
+        Records the current state of the same players and pieces, i.e. the inverse
+        that replays whatever applying this inverse undoes.
+        """
+        return MoveInverse([player for player, _ in self.focus_boards],
+                           [placement[0] for placement in self.placements],
+                           self.is_full_image)
+
+    def apply(self, game_manager):
+        """
+        Restores the recorded fields in place. Only the recorded pieces are lifted
+        off and put back on their boards; the board objects themselves are kept.
+        """
+        if self.members is not None:
+            lifted = [piece for player, _, _ in self.members for piece in player.pieces]
+        else:
+            lifted = [placement[0] for placement in self.placements]
+        for piece in lifted:
+            if piece.board is not None:
+                # Board.remove_piece(x, y) clears a square, the counterpart of place_piece(piece, x, y)
+                piece.board.remove_piece(piece.x, piece.y)
+
+        for piece, x, y, era, position, identifier, board_name in self.placements:
+            piece.x = x
+            piece.y = y
+            piece.era = era
+            piece.position = position
+            piece.identifier = identifier
+            piece.board = game_manager.boards[board_name] if board_name is not None else None
+
+        if self.members is not None:
+            for player, pieces, supply in self.members:
+                player.pieces[:] = pieces
+                player.supply[:] = supply
+            placed = [piece for player, _, _ in self.members for piece in player.pieces]
+        else:
+            placed = lifted
+        for piece in placed:
+            if piece.board is not None:
+                piece.board.place_piece(piece, piece.x, piece.y)
+
+        for player, focus_board in self.focus_boards:
+            player.focus_board = focus_board
+
+
+def _same_pieces(current: List[Piece], recorded: List[Piece]) -> bool:
+    return len(current) == len(recorded) and all(a is b for a, b in zip(current, recorded))
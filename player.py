@@ -1,10 +1,36 @@
+from __future__ import annotations
+
 from abc import ABC, abstractmethod
+from collections import OrderedDict
 import random
+from typing import TYPE_CHECKING, Dict, List, Optional
 
 from piece import Piece
-from game_manager import GameManager
+from move import Move
+
+if TYPE_CHECKING:
+    # game_manager imports this module, so GameManager is only needed for annotations
+    from game_manager import GameManager
+
+ERAS = ['past', 'present', 'future']
+
+HEURISTIC_CACHE_SIZE = 1_000_000
+
+# Heuristic scores keyed by position hash from the evaluating player's side, evicted oldest first
+_heuristic_cache: OrderedDict[int, int] = OrderedDict()
+
+
+def is_central(x: int, y: int) -> bool:
+    """
+    Returns whether (x, y) is one of the four central squares of a board.
+    """
+    return x in (1, 2) and y in (1, 2)
+
 
 class Player(ABC):
+    __slots__ = ('name', 'pieces', 'supply', 'focus_board', 'pieces_by_era',
+                 'active_count', 'eras_occupied', 'central_count')
+
     def __init__(self, name: str):
         """
         Initialize a new player with a name, pieces, supply, and focus board
@@ -24,6 +50,14 @@ class Player(ABC):
         # Set the initial focus board
         self.focus_board = 'past' if name == 'white' else 'future'
 
+        # Pieces on each era board, kept in sync with self.pieces
+        self.pieces_by_era: Dict[str, List[Piece]] = {}
+        # Heuristic tallies over the active pieces, refreshed with pieces_by_era
+        self.active_count: int = 0
+        self.eras_occupied: int = 0
+        self.central_count: int = 0
+        self.index_pieces()
+
     @abstractmethod
     def make_move(self, game_manager):
         """
@@ -34,14 +68,74 @@ class Player(ABC):
     def get_active_pieces(self, board_name: str) -> List[Piece]:
         """
         Returns the player's active pieces on the specified era board.
+        The returned list is shared with the player and must not be modified.
         """
-        return [piece for piece in self.pieces if piece.era == board_name]
+        return self.pieces_by_era[board_name]
+
+    def index_pieces(self):
+        """
+        Rebuilds pieces_by_era and the active, era and central tallies in one
+        pass over the player's pieces. Pieces are indexed by the board they
+        are placed on; pieces without a board are not active.
+        Must be called after pieces move outside add_piece/remove_piece.
+        """
+        self.pieces_by_era = {era: [] for era in ERAS}
+        self.active_count = 0
+        self.eras_occupied = 0
+        self.central_count = 0
+        for piece in self.pieces:
+            self._index_piece(piece)
+
+    def _index_piece(self, piece: Piece):
+        """
+        Adds a piece to pieces_by_era and the tallies, if it is on a board.
+        """
+        if piece.board is None:
+            return
+        board_pieces = self.pieces_by_era[piece.board.name]
+        if not board_pieces:
+            self.eras_occupied += 1
+        board_pieces.append(piece)
+        self.active_count += 1
+        if is_central(piece.x, piece.y):
+            self.central_count += 1
+
+    def piece_moved(self, piece: Piece, old_board_name: Optional[str], old_x: int, old_y: int):
+        """
+        Updates pieces_by_era and the tallies for a piece that moved from the given
+        board and square without entering or leaving the player's pieces.
+        """
+        if old_board_name is not None:
+            board_pieces = self.pieces_by_era[old_board_name]
+            board_pieces.remove(piece)
+            if not board_pieces:
+                self.eras_occupied -= 1
+            self.active_count -= 1
+            if is_central(old_x, old_y):
+                self.central_count -= 1
+        self._index_piece(piece)
+
+    def _unindex_piece(self, piece: Piece):
+        """
+        Removes a piece from pieces_by_era and the tallies, if it is indexed.
+        """
+        if piece.board is None:
+            return
+        board_pieces = self.pieces_by_era[piece.board.name]
+        if piece not in board_pieces:
+            return
+        board_pieces.remove(piece)
+        if not board_pieces:
+            self.eras_occupied -= 1
+        self.active_count -= 1
+        if is_central(piece.x, piece.y):
+            self.central_count -= 1
 
     def update_focus(self, new_focus: str):
         """
         Updates the player's focus board.
         """
-        if new_focus not in ['past', 'present', 'future']:
+        if new_focus not in ERAS:
             raise ValueError(f"Invalid focus board: {new_focus}")
         self.focus_board = new_focus
 
@@ -50,6 +144,7 @@ class Player(ABC):
         Adds a piece to the player's list of pieces.
         """
         self.pieces.append(piece)
+        self._index_piece(piece)
 
     def remove_piece(self, piece: Piece):
         """
@@ -58,6 +153,7 @@ class Player(ABC):
         """
         if piece in self.pieces:
             self.pieces.remove(piece)
+            self._unindex_piece(piece)
         else:
             raise ValueError(f"Piece {piece} not found in player's pieces.")
 
@@ -70,6 +166,14 @@ class Player(ABC):
 
 
 class HumanPlayer(Player):
+    __slots__ = ()
+    VALID_DIRS = frozenset('neswfb')
+    # Direction prompts indexed by move step, formatted once
+    _DIRECTION_PROMPTS = (
+        "Select first direction to move ['n', 'e', 's', 'w', 'f', 'b']: ",
+        "Select second direction to move ['n', 'e', 's', 'w', 'f', 'b']: ",
+    )
+
     def __init__(self, name: str):
         """
         Initialize a HumanPlayer with a given name.
@@ -80,17 +184,15 @@ class HumanPlayer(Player):
         """
         Handles user input to select a piece, move directions, and next focus era.
         Executes the move using the GameManager.
+        The boards have already been displayed by GameManager.run_game.
         """
-        # Display the boards and game state
-        game_manager.display_boards()
-
         # Get active pieces on the current focus board
         active_pieces = self.get_active_pieces(self.focus_board)
         if not active_pieces or all(not piece.can_move(game_manager) for piece in active_pieces):
             print("No copies to move")
             # Prompt for next focus and return
             new_focus = self.prompt_focus_change()
-            self.update_focus(new_focus)
+            game_manager.change_focus(self, new_focus)
             return
 
         # Piece selection loop
@@ -115,8 +217,8 @@ class HumanPlayer(Player):
         directions = []
         for i in range(2):
             while True:
-                direction = input(f"Select {'first' if i == 0 else 'second'} direction to move ['n', 'e', 's', 'w', 'f', 'b']: ").strip().lower()
-                if direction not in ['n', 'e', 's', 'w', 'f', 'b']:
+                direction = input(self._DIRECTION_PROMPTS[i]).strip().lower()
+                if direction not in self.VALID_DIRS:
                     print("Not a valid direction")
                     continue
                 if not game_manager.is_valid_direction(piece, direction):
@@ -155,7 +257,7 @@ class HumanPlayer(Player):
         """
         while True:
             new_focus = input("Select the next era to focus on ['past', 'present', 'future']: ").strip().lower()
-            if new_focus not in ['past', 'present', 'future']:
+            if new_focus not in ERAS:
                 print("Not a valid era")
                 continue
             if new_focus == self.focus_board:
@@ -165,6 +267,8 @@ class HumanPlayer(Player):
 
 
 class RandomPlayer(Player):
+    __slots__ = ()
+
     def __init__(self, name: str):
         """
         Initialize a RandomPlayer with a given name.
@@ -175,30 +279,33 @@ class RandomPlayer(Player):
         """
         Selects a random valid move for the player and applies it.
         """
-        # Get all valid moves for the player
-        valid_moves = game_manager.get_valid_moves(self)
-        
-        if not valid_moves:
+        # Pick a random valid move without collecting them all
+        move = game_manager.sample_valid_move(self, random)
+
+        if move is None:
             # No valid moves, update focus to a random valid era
             print("No copies to move")
-            new_focus = random.choice(['past', 'present', 'future'])
+            new_focus = random.choice(ERAS)
             while new_focus == self.focus_board:
-                new_focus = random.choice(['past', 'present', 'future'])
-            self.update_focus(new_focus)
+                new_focus = random.choice(ERAS)
+            game_manager.change_focus(self, new_focus)
             return
 
-        # Select and apply a random move
-        move = random.choice(valid_moves)
+        # Apply the selected move
         game_manager.apply_move(move)
-        print(f"Selected move: {move}")
+        if game_manager.verbose:
+            print(f"Selected move: {move}")
 
 
 class HeuristicPlayer(Player):
+    __slots__ = ('_heuristic',)
+
     def __init__(self, name: str):
         """
         Initialize a HeuristicAIPlayer with a given name.
         """
         super().__init__(name)
+        self._heuristic = self._compile_heuristic()
 
     def make_move(self, game_manager: GameManager):
         """
@@ -211,43 +318,48 @@ class HeuristicPlayer(Player):
             # No valid moves, select focus era heuristically
             print("No copies to move")
             new_focus = self.choose_focus(game_manager)
-            self.update_focus(new_focus)
+            game_manager.change_focus(self, new_focus)
             return
 
-        # Evaluate all valid moves and find the best one(s)
+        # Evaluate all valid moves, picking uniformly among ties by reservoir sampling
         best_score = float('-inf')
-        best_moves = []
+        selected_move = None
+        tie_count = 0
 
         for move in valid_moves:
             score = self.evaluate_move(move, game_manager)
             if score > best_score:
                 best_score = score
-                best_moves = [move]
+                selected_move = move
+                tie_count = 1
             elif score == best_score:
-                best_moves.append(move)
+                tie_count += 1
+                if random.randrange(tie_count) == 0:
+                    selected_move = move
 
-        # Select one of the best moves at random
-        selected_move = random.choice(best_moves)
         game_manager.apply_move(selected_move)
-        print(f"Selected move: {selected_move}")
+        if game_manager.verbose:
+            print(f"Selected move: {selected_move}")
 
         # Display heuristic scores if enabled
-        if game_manager.score_display_enabled:
+        if game_manager.score_display_enabled and game_manager.verbose:
             self.display_scores(game_manager)
 
     def evaluate_move(self, move: Move, game_manager: GameManager) -> int:
         """
         Evaluates a move using a heuristic function.
-        Temporarily applies the move, calculates the heuristic score, then undoes the move.
-        """
-        # Apply the move temporarily
-        game_manager.apply_move(move)
-
-        # Calculate heuristic score
-        score = self.calculate_heuristic(game_manager)
-
-        # Undo the move
-        game_manager.undo_move()
+        Temporarily applies the move, calculates the heuristic score, then restores the position.
+        """
+        # Apply the move temporarily, outside the move history
+        with game_manager.simulate_move(move):
+            # Calculate heuristic score, reusing it if this position was scored before
+            key = game_manager.position_key(self)
+            score = _heuristic_cache.get(key)
+            if score is None:
+                score = self.calculate_heuristic(game_manager)
+                if len(_heuristic_cache) >= HEURISTIC_CACHE_SIZE:
+                    _heuristic_cache.popitem(last=False)
+                _heuristic_cache[key] = score
         return score
 
     def calculate_heuristic(self, game_manager: GameManager) -> int:
@@ -260,54 +372,56 @@ class HeuristicPlayer(Player):
         - Centrality of pieces
         - Focus considerations
         """
-        c1, c2, c3, c4, c5 = 3, 2, 1, 1, 1  # Weighting coefficients
-        era_presence = self.calculate_era_presence(game_manager)
-        piece_advantage = self.calculate_piece_advantage(game_manager)
-        supply = len(self.supply)
-        centrality = self.calculate_centrality(game_manager)
-        focus = self.calculate_focus_score(game_manager)
-        return c1 * era_presence + c2 * piece_advantage + c3 * supply + c4 * centrality + c5 * focus
+        return self._heuristic(game_manager)
+
+    def _compile_heuristic(self):
+        """
+        Builds the weighted heuristic as a closure with the component methods
+        and weighting coefficients bound as locals, so each call skips the
+        attribute lookups and constant set-up.
+        """
+        def heuristic(game_manager: GameManager, player=self,
+                      era_presence=self.calculate_era_presence,
+                      piece_advantage=self.calculate_piece_advantage,
+                      centrality=self.calculate_centrality,
+                      focus=self.calculate_focus_score,
+                      c1=3, c2=2, c3=1, c4=1, c5=1) -> int:
+            return (c1 * era_presence(game_manager) + c2 * piece_advantage(game_manager)
+                    + c3 * len(player.supply) + c4 * centrality(game_manager)
+                    + c5 * focus(game_manager))
+        return heuristic
 
     def calculate_era_presence(self, game_manager: GameManager) -> int:
         """
         Counts the number of eras where the player has at least one piece.
         """
-        return sum(1 for board in game_manager.boards.values() if self.get_active_pieces(board.name))
+        return self.eras_occupied
 
     def calculate_piece_advantage(self, game_manager: GameManager) -> int:
         """
         Calculates piece advantage: (player pieces - opponent pieces).
         """
         opponent = game_manager.get_opponent(self)
-        player_pieces = sum(len(self.get_active_pieces(board.name)) for board in game_manager.boards.values())
-        opponent_pieces = sum(len(opponent.get_active_pieces(board.name)) for board in game_manager.boards.values())
-        return player_pieces - opponent_pieces
+        return self.active_count - opponent.active_count
 
     def calculate_centrality(self, game_manager: GameManager) -> int:
         """
         Counts the number of player pieces in the central positions of the board.
         """
-        central_positions = {(1, 1), (1, 2), (2, 1), (2, 2)}
-        count = 0
-        for board in game_manager.boards.values():
-            for piece in self.get_active_pieces(board.name):
-                if piece.position in central_positions:
-                    count += 1
-        return count
+        return self.central_count
 
     def calculate_focus_score(self, game_manager: GameManager) -> int:
         """
         Calculates focus score based on pieces in the focus era.
         """
-        focus_board = game_manager.boards[self.focus_board]
-        return len(self.get_active_pieces(focus_board.name))
+        return len(self.pieces_by_era[self.focus_board])
 
     def choose_focus(self, game_manager: GameManager) -> str:
         """
         Selects a new focus era based on heuristic evaluation.
         Prefers the era with the most player pieces.
         """
-        focus_scores = {era: len(self.get_active_pieces(era)) for era in ['past', 'present', 'future']}
+        focus_scores = {era: len(pieces) for era, pieces in self.pieces_by_era.items()}
         return max(focus_scores, key=focus_scores.get)
 
     def display_scores(self, game_manager: GameManager):
@@ -0,0 +1,158 @@
+import sys
+import types
+import unittest
+
+# board, piece and move are not part of this tree, so minimal stand-ins are
+# registered before game_manager is imported. The stub move captures whatever
+# opposing piece stands on a square it steps onto.
+ERAS = ['past', 'present', 'future']
+OFFSETS = {'n': (0, -1, 0), 'e': (1, 0, 0), 's': (0, 1, 0), 'w': (-1, 0, 0), 'f': (0, 0, 1)}
+
+
+class Board:
+    def __init__(self, name):
+        self.name = name
+        self.squares = {}
+
+    def place_piece(self, piece, x, y):
+        assert (x, y) not in self.squares, (self.name, x, y)
+        self.squares[(x, y)] = piece
+
+    def remove_piece(self, x, y):
+        del self.squares[(x, y)]
+
+    def display(self):
+        pass
+
+
+class Piece:
+    def __init__(self, owner, name, era=None, position=None):
+        self.owner = owner
+        self.name = name
+        self.era = era
+        self.position = position
+        self.x = None
+        self.y = None
+        self.board = None
+        self.identifier = None
+
+
+class Move:
+    def __init__(self, piece, directions, new_focus):
+        self.piece = piece
+        self.directions = directions
+        self.new_focus = new_focus
+
+    def execute(self, game_manager):
+        owners = {player.name: player for player in game_manager.players}
+        piece = self.piece
+        for direction in self.directions:
+            dx, dy, era_step = OFFSETS[direction]
+            x, y = piece.x + dx, piece.y + dy
+            board = game_manager.boards[ERAS[ERAS.index(piece.board.name) + era_step]]
+            captured = board.squares.get((x, y))
+            if captured is not None:
+                board.remove_piece(x, y)
+                owners[captured.owner].remove_piece(captured)
+                captured.board = None
+            piece.board.remove_piece(piece.x, piece.y)
+            piece.x, piece.y, piece.board = x, y, board
+            piece.era, piece.position = board.name, (x, y)
+            board.place_piece(piece, x, y)
+        owners[piece.owner].update_focus(self.new_focus)
+
+
+for module_name, classes in [('board', [Board]), ('piece', [Piece]), ('move', [Move])]:
+    module = types.ModuleType(module_name)
+    for stub in classes:
+        setattr(module, stub.__name__, stub)
+    sys.modules[module_name] = module
+
+from game_manager import GameManager  # noqa: E402
+
+
+def snapshot(game_manager):
+    """
+    Everything a move can change, including the derived index and hash.
+    """
+    players = [
+        (player.focus_board, [piece.name for piece in player.pieces], [piece.name for piece in player.supply],
+         {era: sorted(piece.name for piece in pieces) for era, pieces in player.pieces_by_era.items()},
+         player.active_count, player.eras_occupied, player.central_count)
+        for player in game_manager.players
+    ]
+    pieces = sorted(
+        (piece.name, piece.x, piece.y, piece.era, piece.position, piece.identifier,
+         piece.board.name if piece.board is not None else None)
+        for player in game_manager.players for piece in player.pieces + player.supply
+    )
+    squares = {name: {square: piece.name for square, piece in board.squares.items()}
+               for name, board in game_manager.boards.items()}
+    return players, pieces, squares, game_manager.zobrist_hash
+
+
+class MoveInverseTest(unittest.TestCase):
+    def setUp(self):
+        self.game_manager = GameManager('random', 'random', history_enabled=True)
+        self.white, self.black = self.game_manager.players
+        self.boards = dict(self.game_manager.boards)
+        # The white past piece walks to (0, 1), next to the black piece in the corner
+        self.walker = self.white.pieces_by_era['past'][0]
+        self.step = Move(self.walker, ['w', 'w', 'w', 'n', 'n'], 'present')
+        self.capture = Move(self.walker, ['n'], 'future')
+
+    def assertConsistent(self):
+        # The incrementally kept index and hash must match a rebuild from scratch
+        before = snapshot(self.game_manager)
+        self.game_manager.position_changed()
+        self.assertEqual(snapshot(self.game_manager), before)
+        self.assertEqual(self.game_manager.boards, self.boards)
+        for name, board in self.game_manager.boards.items():
+            self.assertIs(board, self.boards[name])
+
+    def test_plain_step_records_only_the_moving_piece(self):
+        self.game_manager.apply_move(self.step)
+        _, inverse = self.game_manager.move_history._undo_stack[-1]
+        self.assertFalse(inverse.is_full_image)
+        self.assertEqual([placement[0] for placement in inverse.placements], [self.walker])
+
+    def test_capture_records_the_full_image(self):
+        self.game_manager.apply_move(self.step)
+        self.game_manager.apply_move(self.capture)
+        _, inverse = self.game_manager.move_history._undo_stack[-1]
+        self.assertTrue(inverse.is_full_image)
+
+    def test_undo_and_redo_restore_each_position(self):
+        positions = [snapshot(self.game_manager)]
+        for move in [self.step, self.capture]:
+            self.game_manager.apply_move(move)
+            self.assertConsistent()
+            positions.append(snapshot(self.game_manager))
+        for position in reversed(positions[:-1]):
+            self.game_manager.undo_move()
+            self.assertConsistent()
+            self.assertEqual(snapshot(self.game_manager), position)
+        for position in positions[1:]:
+            self.game_manager.redo_move()
+            self.assertConsistent()
+            self.assertEqual(snapshot(self.game_manager), position)
+
+    def test_simulate_move_restores_the_position(self):
+        before = snapshot(self.game_manager)
+        with self.game_manager.simulate_move(self.step):
+            self.assertConsistent()
+        self.assertEqual(snapshot(self.game_manager), before)
+        self.assertConsistent()
+
+        self.game_manager.apply_move(self.step)
+        before = snapshot(self.game_manager)
+        with self.game_manager.simulate_move(self.capture):
+            self.assertConsistent()
+            self.assertEqual(self.black.active_count, 2)
+        self.assertEqual(snapshot(self.game_manager), before)
+        self.assertConsistent()
+        self.assertFalse(self.game_manager.move_history.can_redo())
+
+
+if __name__ == '__main__':
+    unittest.main()